@@ -1,35 +1,99 @@
 import sys
 import os
+import atexit
+import locale
+import signal
 import subprocess
-import shlex
+from itertools import islice
 from shutil import which  # To resolve executables from PATH
 
+try:
+    import readline  # Importing it gives input() line editing and history
+except ImportError:
+    readline = None  # Not available on Windows
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".pyshellx_history")
+HISTORY_LENGTH = 1000
+
 # Define the built-in commands
-BUILTIN_COMMANDS = {"echo", "exit", "type", "pwd", "cd"}
+BUILTIN_COMMANDS = frozenset({"echo", "exit", "type", "pwd", "cd", "hash"})
+_EXIT0 = ("exit", "0")
+
+# Current working directory, refreshed whenever the shell changes directory so pwd needs no syscall
+_CWD = os.getcwd()
+
+# Redirection operators mapped to (stream, append mode)
+REDIR_OPS = {
+    ">": ("out", False),
+    "1>": ("out", False),
+    ">>": ("out", True),
+    "1>>": ("out", True),
+    "2>": ("err", False),
+    "2>>": ("err", True),
+}
+
+# Intern the builtin names and redirection operators; the tokenizer interns short tokens too, so the
+# dispatch and redirection lookups usually match by identity without comparing characters
+_MAX_INTERNED_TOKEN = max(map(len, BUILTIN_COMMANDS | REDIR_OPS.keys()))
+for _name in BUILTIN_COMMANDS | REDIR_OPS.keys():
+    sys.intern(_name)
+del _name
+
+# Tokenizer states for parse_input
+_DEFAULT, _IN_SINGLE, _IN_DOUBLE, _ESCAPE, _ESCAPE_IN_DOUBLE = range(5)
+_SPECIAL = {" ", "\t"}  # Characters that separate tokens outside of quotes
+_DOUBLE_QUOTE_ESCAPES = {'"', "\\", "$", "`"}  # Characters a backslash escapes inside double quotes
+
+# Cache of found executables, keyed by (command, PATH) so a PATH change never returns stale results
+_which_cache = {}
 
 
 def find_executable(command):
     """Search for the command in the directories listed in the PATH environment variable."""
-    return which(command)  # Automatically searches in PATH
+    key = (command, os.environ.get("PATH", ""))
+    if key in _which_cache:
+        return _which_cache[key]
+
+    resolved = which(command)  # Automatically searches in PATH
+    # Like bash's hash table, remember only commands that were found, so installing one later works
+    # straight away; names with a separator resolve against the cwd, which the key does not capture
+    if resolved and os.sep not in command:
+        _which_cache[key] = resolved
+    return resolved
+
+
+_HAS_POSIX_SPAWN = hasattr(os, "posix_spawn")  # Not available on Windows
+_RESTORE_SIGNALS = tuple(getattr(signal, name) for name in ("SIGPIPE", "SIGXFSZ") if hasattr(signal, name))
+_HAS_WRITEV = hasattr(os, "writev")  # Not available on Windows
+# Most buffers a single writev call accepts; sysconf reports -1 when the limit is indeterminate
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if _HAS_WRITEV else 0
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+# Encoding open() would use for the file; surrogateescape writes back undecodable input bytes unchanged
+_FILE_ENCODING = locale.getpreferredencoding(False)
 
 
 def run_external_command(command_parts, output_file=None, append_output=False, error_file=None, append_error=False):
     """Run an external command with optional output (overwrite/append) and error redirection."""
     try:
+        if output_file is None and error_file is None and _HAS_POSIX_SPAWN:
+            # Nothing to redirect: spawn and wait directly, skipping subprocess's bookkeeping.
+            # A bare name (e.g. an executable file that happens to sit in the cwd) is searched for in
+            # PATH, just like subprocess does, rather than being run from the cwd.
+            spawn = os.posix_spawn if os.sep in command_parts[0] else os.posix_spawnp
+            # Restore the signals CPython ignores at startup, as subprocess's restore_signals=True does
+            pid = spawn(command_parts[0], command_parts, os.environ, setsigdef=_RESTORE_SIGNALS)
+            os.waitpid(pid, 0)
+            return
+
         stdout_mode = "a" if append_output else "w"
         stderr_mode = "a" if append_error else "w"
 
-        stdout_target = open(output_file, stdout_mode) if output_file else subprocess.PIPE
-        stderr_target = open(error_file, stderr_mode) if error_file else subprocess.PIPE
+        # Streams that are not redirected are inherited, so the command writes straight to the terminal
+        stdout_target = open(output_file, stdout_mode) if output_file else None
+        stderr_target = open(error_file, stderr_mode) if error_file else None
 
-        result = subprocess.run(command_parts, text=True, stdout=stdout_target, stderr=stderr_target)
-
-        # Print to console only if output is not redirected
-        if not output_file:
-            sys.stdout.write(result.stdout)
-
-        if not error_file:
-            sys.stderr.write(result.stderr)
+        subprocess.run(command_parts, stdout=stdout_target, stderr=stderr_target)
 
         if output_file:
             stdout_target.close()
@@ -44,13 +108,61 @@ def run_external_command(command_parts, output_file=None, append_output=False, e
         print(f"Error running command: {e}", file=sys.stderr)
 
 
+def _write_all(fd, data):
+    """Write every byte of data to fd, retrying after partial writes (e.g. to a full pipe)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def write_echo(args, output_file, append_output):
+    """Write echo's arguments (any iterable of str) to a file, gathered into one writev call where possible."""
+    if not _HAS_WRITEV:
+        with open(output_file, "a" if append_output else "w") as f:
+            f.write(" ".join(args) + "\n")
+        return
+
+    iov = []
+    for arg in args:
+        iov.append(arg.encode(_FILE_ENCODING, "surrogateescape"))
+        iov.append(b" ")
+    if iov:
+        iov[-1] = b"\n"  # The last separator becomes the trailing newline
+    else:
+        iov.append(b"\n")
+
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append_output else os.O_TRUNC)
+    fd = os.open(output_file, flags, 0o644)
+    try:
+        start = 0
+        while start < len(iov):
+            written = os.writev(fd, iov[start:start + _IOV_MAX])
+            # Skip the buffers that were written completely; finish a partially written one with _write_all
+            while start < len(iov) and written >= len(iov[start]):
+                written -= len(iov[start])
+                start += 1
+            if written:
+                _write_all(fd, iov[start][written:])
+                start += 1
+    finally:
+        os.close(fd)
+
+
 def change_directory(path):
     """Handle the cd command with absolute, relative, and home directory paths."""
+    global _CWD
     if path == "~":
         path = os.environ.get("HOME", "/")  # Get home directory, default to root if not set
 
+    # Resolve relative paths against the cached working directory instead of asking the OS for it
+    if path.startswith(os.sep) or (os.altsep and path.startswith(os.altsep)):
+        target = os.path.normpath(path)
+    else:
+        target = os.path.normpath(os.path.join(_CWD, path))
+
     try:
-        os.chdir(os.path.abspath(path))  # Convert relative path to absolute and change directory
+        os.chdir(target)
+        _CWD = target
     except FileNotFoundError:
         print(f"cd: {path}: No such file or directory", file=sys.stderr)
     except NotADirectoryError:
@@ -60,60 +172,114 @@ def change_directory(path):
 
 
 def parse_input(user_input):
-    """Parse input while handling quoted executables, arguments, and redirections."""
+    """
+    Parse input while handling quoted executables, arguments, and redirections. Returns:
+    - The command without redirection parts
+    - The output file (if present) and append mode flag
+    - The error file (if present) and append mode flag
+    """
     try:
-        return shlex.split(user_input, posix=True)  # Properly handles quotes, backslashes, and spaces
+        return _tokenize(user_input)  # Properly handles quotes, backslashes, spaces and redirections
     except ValueError as e:
         print(f"Parsing error: {e}", file=sys.stderr)
-        return []
+        return [], None, False, None, False
 
 
-def handle_redirection(command_parts):
+def _tokenize(user_input):
     """
-    Checks for output (`>`, `1>`, `>>`, `1>>`) and error (`2>`, `2>>`) redirection and returns:
-    - The command without redirection parts
-    - The output file (if present) and append mode flag
-    - The error file (if present) and append mode flag
+    Split a command line into tokens in a single pass, following POSIX shell quoting rules.
+    Unquoted redirection operators (`>`, `1>`, `>>`, `1>>`, `2>`, `2>>`) are consumed together
+    with the filename that follows them instead of being added to the command.
     """
+    clean_command = []
     output_file = None
     append_output = False
     error_file = None
     append_error = False
-    clean_command = []
-
-    i = 0
-    while i < len(command_parts):
-        if command_parts[i] in [">", "1>"]:
-            if i + 1 < len(command_parts):
-                output_file = command_parts[i + 1]
-                append_output = False  # Overwrite mode
-                i += 1  # Skip next argument (filename)
-            else:
-                print("Syntax error: Missing file for output redirection", file=sys.stderr)
-        elif command_parts[i] in [">>", "1>>"]:
-            if i + 1 < len(command_parts):
-                output_file = command_parts[i + 1]
-                append_output = True  # Append mode
-                i += 1  # Skip next argument (filename)
+    pending_redir = None  # (stream, append mode) of an operator still waiting for its filename
+
+    buf = []
+    in_token = False  # True once the current token has started, so that "" yields an empty argument
+    quoted = False  # True if any part of the current token was quoted or escaped
+    state = _DEFAULT
+
+    def end_token(token, is_quoted):
+        nonlocal output_file, append_output, error_file, append_error, pending_redir
+        if len(token) <= _MAX_INTERNED_TOKEN:
+            token = sys.intern(token)
+
+        if pending_redir is not None:
+            kind, append = pending_redir
+            pending_redir = None
+            if kind == "out":
+                output_file = token
+                append_output = append
             else:
-                print("Syntax error: Missing file for output redirection", file=sys.stderr)
-        elif command_parts[i] == "2>":
-            if i + 1 < len(command_parts):
-                error_file = command_parts[i + 1]
-                append_error = False  # Overwrite mode
-                i += 1  # Skip next argument (filename)
-            else:
-                print("Syntax error: Missing file for error redirection", file=sys.stderr)
-        elif command_parts[i] == "2>>":
-            if i + 1 < len(command_parts):
-                error_file = command_parts[i + 1]
-                append_error = True  # Append mode
-                i += 1  # Skip next argument (filename)
-            else:
-                print("Syntax error: Missing file for error redirection", file=sys.stderr)
+                error_file = token
+                append_error = append
+        elif not is_quoted and token in REDIR_OPS:
+            pending_redir = REDIR_OPS[token]
         else:
-            clean_command.append(command_parts[i])
-        i += 1
+            clean_command.append(token)
+
+    if not ("'" in user_input or '"' in user_input or "\\" in user_input):
+        # Nothing is quoted or escaped, so let str.split find the tokens in C instead of walking
+        # the line one character at a time (this matters for long pasted command lines)
+        for token in user_input.replace("\t", " ").split(" "):
+            if token:
+                end_token(token, False)
+    else:
+        for ch in user_input:
+            if state == _DEFAULT:
+                if ch in _SPECIAL:
+                    if in_token:
+                        end_token("".join(buf), quoted)
+                        buf.clear()
+                        in_token = quoted = False
+                elif ch == "'":
+                    state = _IN_SINGLE
+                    in_token = quoted = True
+                elif ch == '"':
+                    state = _IN_DOUBLE
+                    in_token = quoted = True
+                elif ch == "\\":
+                    state = _ESCAPE
+                    in_token = quoted = True
+                else:
+                    buf.append(ch)
+                    in_token = True
+            elif state == _IN_SINGLE:
+                if ch == "'":
+                    state = _DEFAULT
+                else:
+                    buf.append(ch)
+            elif state == _IN_DOUBLE:
+                if ch == '"':
+                    state = _DEFAULT
+                elif ch == "\\":
+                    state = _ESCAPE_IN_DOUBLE
+                else:
+                    buf.append(ch)
+            elif state == _ESCAPE:
+                buf.append(ch)
+                state = _DEFAULT
+            else:  # _ESCAPE_IN_DOUBLE: the backslash is only special before a few characters
+                if ch not in _DOUBLE_QUOTE_ESCAPES:
+                    buf.append("\\")
+                buf.append(ch)
+                state = _IN_DOUBLE
+
+        if state in (_IN_SINGLE, _IN_DOUBLE, _ESCAPE_IN_DOUBLE):
+            raise ValueError("No closing quotation")
+        if state == _ESCAPE:
+            raise ValueError("No escaped character")
+
+        if in_token:
+            end_token("".join(buf), quoted)
+
+    if pending_redir is not None:
+        stream = "output" if pending_redir[0] == "out" else "error"
+        print(f"Syntax error: Missing file for {stream} redirection", file=sys.stderr)
 
     return clean_command, output_file, append_output, error_file, append_error
 
@@ -137,77 +303,151 @@ def execute_quoted_executable(command_parts, output_file=None, append_output=Fal
         print(f"{executable_path}: command not found", file=sys.stderr)
 
 
+def _builtin_echo(command_parts, output_file, append_output, error_file, append_error):
+    """Handle echo command with optional redirection."""
+    if output_file:
+        write_echo(islice(command_parts, 1, None), output_file, append_output)  # No copy of the argument list
+    else:
+        # Join and encode in C, then hand the bytes straight to fd 1; sys.stdout holds nothing
+        # unflushed here because it is line buffered and every earlier write ended in a newline
+        line = " ".join(command_parts[1:]) + "\n"
+        _write_all(1, line.encode(sys.stdout.encoding, sys.stdout.errors))  # Encode exactly as print would
+
+
+def _builtin_type(command_parts, output_file, append_output, error_file, append_error):
+    """Handle type command: check for built-ins and executables in PATH."""
+    if len(command_parts) < 2:
+        print("type: missing operand", file=sys.stderr)
+        return
+
+    cmd_to_check = command_parts[1]
+    if cmd_to_check in BUILTIN_COMMANDS:
+        print(f"{cmd_to_check} is a shell builtin")
+    else:
+        executable_path = find_executable(cmd_to_check)
+        if executable_path:
+            print(f"{cmd_to_check} is {executable_path}")
+        else:
+            print(f"{cmd_to_check}: not found", file=sys.stderr)
+
+
+def _builtin_hash(command_parts, output_file, append_output, error_file, append_error):
+    """Handle hash command: only `hash -r` (forget all remembered locations) is supported."""
+    if len(command_parts) > 1 and command_parts[1] == "-r":
+        _which_cache.clear()
+    else:
+        print("hash: usage: hash -r", file=sys.stderr)
+
+
+def _builtin_pwd(command_parts, output_file, append_output, error_file, append_error):
+    """Handle pwd command with optional redirection."""
+    output = _CWD
+    if output_file:
+        mode = "a" if append_output else "w"
+        with open(output_file, mode) as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def _builtin_cd(command_parts, output_file, append_output, error_file, append_error):
+    """Handle cd command, going to the home directory when no path is given."""
+    change_directory(command_parts[1] if len(command_parts) > 1 else "~")
+
+
+def _builtin_exit(command_parts, output_file, append_output, error_file, append_error):
+    """Handle exit command: leave the shell with the given status code (0 if omitted)."""
+    # `exit` and `exit 0` are by far the most common forms, so they skip parsing the status
+    if len(command_parts) == 1 or (len(command_parts) == 2 and tuple(command_parts) == _EXIT0):
+        sys.exit(0)
+
+    try:
+        status = int(command_parts[1])
+    except ValueError:
+        print(f"exit: {command_parts[1]}: numeric argument required", file=sys.stderr)
+        status = 2
+    sys.exit(status)
+
+
+# Map each built-in command name to its handler; every handler takes the parsed command and redirections
+BUILTIN_DISPATCH = {
+    "echo": _builtin_echo,
+    "type": _builtin_type,
+    "hash": _builtin_hash,
+    "pwd": _builtin_pwd,
+    "cd": _builtin_cd,
+    "exit": _builtin_exit,
+}
+
+
+def setup_history():
+    """Load the readline history file and save it again when the shell exits."""
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass  # No history yet (or it is unreadable); start with an empty one
+    readline.set_history_length(HISTORY_LENGTH)
+    atexit.register(_save_history)
+
+
+def _save_history():
+    """Write the readline history back to HISTORY_FILE."""
+    try:
+        readline.write_history_file(HISTORY_FILE)
+    except OSError:
+        pass  # Losing history must never stop the shell from exiting
+
+
 def main():
-    while True:
-        sys.stdout.write("$ ")
-        sys.stdout.flush()  # Ensure prompt is displayed immediately
+    # Flush stdout at every newline so builtin output never lands after a prompt written with os.write
+    sys.stdout.reconfigure(line_buffering=True)
+    prompt = b"$ "
 
-        try:
-            user_input = input().strip()
-            if not user_input:
-                continue  # Skip empty input
+    # readline has to own the prompt on a terminal, otherwise redrawing the line (history, editing) erases it
+    readline_prompt = readline is not None and sys.stdin.isatty()
+    if readline_prompt:
+        setup_history()
 
-            command_parts = parse_input(user_input)  # Handle quoted executables and arguments properly
-            if not command_parts:
-                continue
+    reading_input = False
 
-            command_parts, output_file, append_output, error_file, append_error = handle_redirection(
-                command_parts)  # Check for output and error redirection
+    def handle_sigint(signum, frame):
+        """Handle Ctrl+C: abandon the line being typed, or just print a new line while a command runs."""
+        if reading_input:
+            raise KeyboardInterrupt  # Makes input() drop the typed line, including readline's state
+        os.write(1, b"\n")
 
-            if not command_parts:
-                continue
+    # While a command runs the child gets the terminal's SIGINT itself, and waiting for it simply
+    # resumes once the handler returns instead of unwinding through a KeyboardInterrupt
+    signal.signal(signal.SIGINT, handle_sigint)
 
-            if command_parts[0] == "exit" and len(command_parts) == 2 and command_parts[1] == "0":
-                sys.exit(0)  # Exit with status code 0
+    while True:
+        if not readline_prompt:
+            os.write(1, prompt)  # Unbuffered, so the prompt is displayed immediately
 
-            if command_parts[0] == "echo":
-                # Handle echo command with optional redirection
-                output = " ".join(command_parts[1:])
-                if output_file:
-                    mode = "a" if append_output else "w"
-                    with open(output_file, mode) as f:
-                        f.write(output + "\n")
-                else:
-                    print(output)
+        try:
+            try:
+                reading_input = True
+                user_input = (input("$ ") if readline_prompt else input()).strip()
+            except KeyboardInterrupt:
+                sys.stdout.write("\n")  # Handle Ctrl+C at the prompt: discard the line and print a new one
+                continue
+            finally:
+                reading_input = False
 
-            elif command_parts[0] == "type":
-                # Handle type command: check for built-ins and executables in PATH
-                cmd_to_check = command_parts[1]
-                if cmd_to_check in BUILTIN_COMMANDS:
-                    print(f"{cmd_to_check} is a shell builtin")
-                else:
-                    executable_path = find_executable(cmd_to_check)
-                    if executable_path:
-                        print(f"{cmd_to_check} is {executable_path}")
-                    else:
-                        print(f"{cmd_to_check}: not found", file=sys.stderr)
-
-            elif command_parts[0] == "pwd":
-                # Handle pwd command
-                output = os.getcwd()
-                if output_file:
-                    mode = "a" if append_output else "w"
-                    with open(output_file, mode) as f:
-                        f.write(output + "\n")
-                else:
-                    print(output)
+            if not user_input:
+                continue  # Skip empty input
 
-            elif command_parts[0] == "cd":
-                # Handle cd command
-                if len(command_parts) > 1:
-                    change_directory(command_parts[1])
-                else:
-                    home_path = os.environ.get("HOME", "/")  # Default to root if HOME is not set
-                    os.chdir(home_path)
+            # Handle quoted executables, arguments, and output and error redirection
+            command_parts, output_file, append_output, error_file, append_error = parse_input(user_input)
+            if not command_parts:
+                continue
 
-            else:
-                # Handle executing quoted executable names
-                execute_quoted_executable(command_parts, output_file, append_output, error_file, append_error)
+            # Run the built-in handler, or fall back to executing the command as an external program
+            handler = BUILTIN_DISPATCH.get(command_parts[0], execute_quoted_executable)
+            handler(command_parts, output_file, append_output, error_file, append_error)
 
         except EOFError:
             sys.exit(0)  # Handle EOF (Ctrl+D) gracefully with exit code 0
-        except KeyboardInterrupt:
-            sys.stdout.write("\n")  # Handle Ctrl+C and print a new line
 
 
 if __name__ == "__main__":